@@ -24,21 +24,24 @@ import os
 import asyncio
 import logging
 import time
-import json
+import orjson
 from datetime import datetime
 from typing import List, Dict, Any, Optional, AsyncGenerator
 from contextlib import asynccontextmanager
 
 # Core FastAPI imports
-from fastapi import FastAPI, HTTPException, Request, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Request, Response, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse, JSONResponse
+from fastapi.responses import StreamingResponse, ORJSONResponse
 from fastapi.security import HTTPBearer
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+import httpx
+import msgspec
 import uvicorn
 from dotenv import load_dotenv
 
 # Enhanced caching and performance
+from collections import OrderedDict
 from functools import lru_cache
 import hashlib
 
@@ -72,16 +75,35 @@ sys.path.insert(0, project_root)
 # Load environment variables
 load_dotenv()
 
-# Global cache for responses (in-memory for demo, could use Redis in production)
-response_cache = {}
+# Redis-backed semantic cache (shared across workers); in-memory LRU kept as fallback
+semantic_cache = None
+response_cache = OrderedDict()
 cache_stats = {"hits": 0, "misses": 0, "total_requests": 0}
 
+# Admission control for in-flight RAG work. A counter + Condition instead of a
+# Semaphore so the cap can be resized at runtime (PATCH /metrics) without
+# recreating the primitive under waiting tasks.
+_inflight = 0
+_cap = int(os.getenv("MAX_INFLIGHT", "8"))
+_cv = asyncio.Condition()
+
+# Coarse per-second timestamp for hot-path response ids / `created` fields.
+# Calling time.time()/datetime.now() several times per request (and per SSE
+# chunk) is needless allocation; a 1 Hz ticker keeps this fresh enough.
+_now_s = int(time.time())
+
+async def _tick():
+    global _now_s
+    while True:
+        _now_s = int(time.time())
+        await asyncio.sleep(1)
+
 class EnhancedRAGAPI:
     """Enhanced RAG API with advanced features and optimizations"""
-    
+
     def __init__(self):
         self.initialize_components()
-    
+
     def initialize_components(self):
         """Initialize enhanced components"""
         try:
@@ -92,6 +114,37 @@ class EnhancedRAGAPI:
             logger.error(f" Failed to import RAG components: {e}")
             raise
 
+        self.setup_semantic_cache()
+
+    def setup_semantic_cache(self):
+        """Initialize the Redis semantic cache for cross-worker response caching"""
+        global semantic_cache
+        try:
+            from redisvl.extensions.llmcache import SemanticCache
+            from redisvl.utils.vectorize import CustomTextVectorizer
+            from llama_index.embeddings.ollama import OllamaEmbedding
+
+            # Reuse the same embedding model as ingestion so cached queries
+            # match on semantic similarity, not exact text
+            ollama_base_url = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+            embed_model = OllamaEmbedding(
+                model_name="nomic-embed-text",
+                base_url=ollama_base_url
+            )
+            vectorizer = CustomTextVectorizer(embed=embed_model.get_text_embedding)
+
+            semantic_cache = SemanticCache(
+                name="rag",
+                redis_url=os.getenv("REDIS_URL", "redis://localhost:6379"),
+                vectorizer=vectorizer,
+                distance_threshold=0.1,
+                ttl=300
+            )
+            logger.info("Redis semantic cache initialized")
+        except Exception as e:
+            logger.warning(f" Semantic cache unavailable, falling back to in-memory cache: {e}")
+            semantic_cache = None
+
 # Initialize enhanced API
 enhanced_api = EnhancedRAGAPI()
 
@@ -100,11 +153,21 @@ async def lifespan(app: FastAPI):
     """Enhanced application lifespan management"""
     logger.info("🚀 Starting Enhanced Agentic RAG API Server")
     logger.info("🔧 Initializing advanced components...")
-    
+
     # Startup tasks
+    clock_task = asyncio.create_task(_tick())
+
+    # Shared pooled HTTP client so downstream calls (Ollama, tracing, tools)
+    # reuse keep-alive connections instead of paying a handshake per call
+    app.state.http = httpx.AsyncClient(
+        limits=httpx.Limits(max_connections=200, max_keepalive_connections=100),
+        timeout=httpx.Timeout(30.0, connect=5.0)
+    )
     yield
-    
+
     # Cleanup tasks
+    await app.state.http.aclose()
+    clock_task.cancel()
     logger.info("🛑 Shutting down Enhanced RAG API")
     logger.info(f"Cache Stats - Hits: {cache_stats['hits']}, Misses: {cache_stats['misses']}")
 
@@ -128,6 +191,7 @@ app = FastAPI(
     version="2.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    default_response_class=ORJSONResponse,  # Rust JSON encoder for every endpoint
     lifespan=lifespan
 )
 
@@ -140,27 +204,21 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Enhanced Pydantic models
+# Enhanced Pydantic models (v2 style so validation runs in pydantic-core)
 class EnhancedChatMessage(BaseModel):
-    role: str = Field(..., regex="^(system|user|assistant)$")
+    role: str = Field(..., pattern="^(system|user|assistant)$")
     content: str = Field(..., min_length=1, max_length=10000)
-    
-    @validator('content')
+
+    @field_validator('content')
+    @classmethod
     def validate_content(cls, v):
         if not v.strip():
             raise ValueError('Content cannot be empty')
         return v.strip()
 
 class EnhancedChatRequest(BaseModel):
-    model: str = Field(default="enhanced-agentic-rag", description="Model identifier")
-    messages: List[EnhancedChatMessage] = Field(..., min_items=1)
-    max_tokens: Optional[int] = Field(default=4000, ge=1, le=8000)
-    temperature: Optional[float] = Field(default=0.7, ge=0.0, le=2.0)
-    stream: Optional[bool] = Field(default=False)
-    top_k: Optional[int] = Field(default=10, ge=1, le=50, description="Number of documents to retrieve")
-    
-    class Config:
-        schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "model": "enhanced-agentic-rag",
                 "messages": [
@@ -173,71 +231,135 @@ class EnhancedChatRequest(BaseModel):
                 "top_k": 10
             }
         }
+    )
+
+    model: str = Field(default="enhanced-agentic-rag", description="Model identifier")
+    messages: List[EnhancedChatMessage] = Field(..., min_length=1)
+    max_tokens: Optional[int] = Field(default=4000, ge=1, le=8000)
+    temperature: Optional[float] = Field(default=0.7, ge=0.0, le=2.0)
+    stream: Optional[bool] = Field(default=False)
+    top_k: Optional[int] = Field(default=10, ge=1, le=50, description="Number of documents to retrieve")
 
-class EnhancedChatResponse(BaseModel):
-    id: str = Field(..., description="Unique response identifier")
-    object: str = Field(default="chat.completion")
-    created: int = Field(..., description="Unix timestamp")
-    model: str = Field(..., description="Model used")
-    choices: List[Dict[str, Any]] = Field(..., description="Response choices")
-    usage: Dict[str, int] = Field(..., description="Token usage statistics")
-    metadata: Dict[str, Any] = Field(default_factory=dict, description="Additional metadata")
-
-class HealthResponse(BaseModel):
-    status: str = Field(..., description="Service health status")
-    timestamp: str = Field(..., description="Current timestamp")
-    version: str = Field(..., description="API version")
-    cache_stats: Dict[str, int] = Field(..., description="Cache performance statistics")
-    uptime_seconds: float = Field(..., description="Service uptime in seconds")
+# Egress-only models: we build them, FastAPI just dumps them. msgspec.Struct
+# skips Pydantic's construction-time validation/copying and its C encoder
+# serializes directly to bytes.
+class EnhancedChatResponse(msgspec.Struct):
+    id: str
+    created: int
+    model: str
+    choices: List[Dict[str, Any]]
+    usage: Dict[str, int]
+    object: str = "chat.completion"
+    metadata: Dict[str, Any] = msgspec.field(default_factory=dict)
+
+class HealthResponse(msgspec.Struct):
+    status: str
+    timestamp: str
+    version: str
+    cache_stats: Dict[str, int]
+    uptime_seconds: float
+
+def msgspec_response(payload) -> Response:
+    """Encode an egress Struct straight to a JSON response"""
+    return Response(msgspec.json.encode(payload), media_type="application/json")
 
 # Application startup time for uptime calculation
 app_start_time = time.time()
 
+# blake3 is SIMD-accelerated and much faster than md5 for per-request hashing;
+# keep an md5 fallback so the API still runs without the optional extension
+try:
+    from blake3 import blake3
+
+    def _hash_key(data: bytes) -> str:
+        return blake3(data).hexdigest(length=16)
+except ImportError:
+    def _hash_key(data: bytes) -> str:
+        return hashlib.md5(data).hexdigest()
+
 def generate_cache_key(query: str, top_k: int = 10) -> str:
     """Generate cache key for query"""
     key_data = f"{query.lower().strip()}_{top_k}"
-    return hashlib.md5(key_data.encode()).hexdigest()
+    return _hash_key(key_data.encode())
 
-def get_cached_response(cache_key: str) -> Optional[Dict[str, Any]]:
-    """Get cached response if available and not expired (5 min TTL)"""
+async def get_cached_response(query: str, top_k: int = 10) -> Optional[Dict[str, Any]]:
+    """Get cached response if available (semantic match via Redis, 5 min TTL).
+
+    The semantic check embeds the query via Ollama plus a Redis round-trip,
+    both blocking; run it on a worker thread so the event loop stays free.
+    """
+    if semantic_cache is not None:
+        try:
+            hits = await asyncio.to_thread(
+                semantic_cache.check, prompt=query, num_results=1
+            )
+            if hits:
+                cache_stats["hits"] += 1
+                hit = hits[0]
+                response = dict(hit.get("metadata") or {})
+                response["content"] = hit["response"]
+                return response
+            cache_stats["misses"] += 1
+            return None
+        except Exception as e:
+            logger.warning(f" Semantic cache check failed: {e}")
+
+    cache_key = generate_cache_key(query, top_k)
     if cache_key in response_cache:
         cached_data = response_cache[cache_key]
         if time.time() - cached_data["timestamp"] < 300:  # 5 min TTL
             cache_stats["hits"] += 1
+            response_cache.move_to_end(cache_key)  # Mark as recently used
             return cached_data["response"]
         else:
             # Remove expired cache entry
             del response_cache[cache_key]
-    
+
     cache_stats["misses"] += 1
     return None
 
-def cache_response(cache_key: str, response: Dict[str, Any]):
-    """Cache response with timestamp"""
+async def cache_response(query: str, response: Dict[str, Any], top_k: int = 10):
+    """Cache response (semantic store via Redis with in-memory fallback).
+
+    Like the check, the store embeds and writes to Redis synchronously,
+    so it runs off the event loop.
+    """
+    if semantic_cache is not None:
+        try:
+            metadata = {k: v for k, v in response.items() if k != "content"}
+            await asyncio.to_thread(
+                semantic_cache.store,
+                prompt=query,
+                response=response["content"],
+                metadata=metadata
+            )
+            return
+        except Exception as e:
+            logger.warning(f" Semantic cache store failed: {e}")
+
+    cache_key = generate_cache_key(query, top_k)
     response_cache[cache_key] = {
         "response": response,
         "timestamp": time.time()
     }
-    
-    # Simple cache size management (keep only 1000 entries)
-    if len(response_cache) > 1000:
-        # Remove oldest 100 entries
-        oldest_keys = sorted(response_cache.keys(), 
-                           key=lambda k: response_cache[k]["timestamp"])[:100]
-        for key in oldest_keys:
-            del response_cache[key]
+    response_cache.move_to_end(cache_key)
+
+    # Evict least-recently-used entries in O(1) (keep only 1000 entries)
+    while len(response_cache) > 1000:
+        response_cache.popitem(last=False)
 
 async def process_rag_query(query: str, top_k: int = 10) -> Dict[str, Any]:
     """Enhanced RAG query processing with error handling and optimization"""
     try:
-        logger.info(f" Processing enhanced query: {query[:100]}...")
-        start_time = time.time()
+        logger.info(" Processing enhanced query: %.100s...", query)
+        start_time = time.perf_counter()
         
-        # Create and run RAG crew
+        # Create and run RAG crew natively on the event loop - no worker
+        # thread is tied up for the duration of the crew run
         rag_crew = enhanced_api.create_rag_crew(query)
-        result = await asyncio.to_thread(rag_crew.kickoff)
+        result = await rag_crew.kickoff_async()
         
-        processing_time = time.time() - start_time
+        processing_time = time.perf_counter() - start_time
         
         # Enhanced response with metadata
         response_data = {
@@ -249,7 +371,7 @@ async def process_rag_query(query: str, top_k: int = 10) -> Dict[str, Any]:
             "timestamp": datetime.now().isoformat()
         }
         
-        logger.info(f"Query processed in {processing_time:.2f}s")
+        logger.info("Query processed in %.2fs", processing_time)
         return response_data
         
     except Exception as e:
@@ -259,48 +381,131 @@ async def process_rag_query(query: str, top_k: int = 10) -> Dict[str, Any]:
             detail=f"RAG processing failed: {str(e)}"
         )
 
-async def stream_response(content: str) -> AsyncGenerator[str, None]:
-    """Stream response in chunks for better UX"""
-    words = content.split()
-    chunk_size = 5  # words per chunk
-    
-    for i in range(0, len(words), chunk_size):
-        chunk_words = words[i:i + chunk_size]
-        chunk_text = " ".join(chunk_words)
-        
-        chunk_data = {
-            "id": f"chatcmpl-{int(time.time())}",
-            "object": "chat.completion.chunk",
-            "created": int(time.time()),
-            "model": "enhanced-agentic-rag",
-            "choices": [{
-                "delta": {"content": chunk_text + " "},
-                "index": 0,
-                "finish_reason": None
-            }]
-        }
-        
-        yield f"data: {json.dumps(chunk_data)}\n\n"
-        await asyncio.sleep(0.05)  # Small delay for streaming effect
-    
+async def stream_rag_query(query: str, top_k: int = 10) -> AsyncGenerator[str, None]:
+    """Stream answer tokens from the RAG crew as the upstream LLM emits them"""
+    global _inflight
+    async with _cv:
+        await _cv.wait_for(lambda: _inflight < _cap)
+        _inflight += 1
+
+    try:
+        from crewai.utilities.events import crewai_event_bus, LLMStreamChunkEvent
+
+        queue: asyncio.Queue = asyncio.Queue()
+        loop = asyncio.get_running_loop()
+
+        logger.info(" Streaming enhanced query: %.100s...", query)
+        start_time = time.perf_counter()
+
+        rag_crew = enhanced_api.create_rag_crew(query)
+
+        # The agents share one LLM instance, so the event source cannot tell
+        # concurrent requests apart; match on the event's agent/task ids
+        crew_agent_ids = {str(agent.id) for agent in rag_crew.agents}
+        crew_task_ids = {str(task.id) for task in rag_crew.tasks}
+
+        def _forward_chunk(source, event):
+            # The bus is process-global: drop chunks attributed to another
+            # crew so concurrent streams don't bleed into each other
+            agent_id = getattr(event, "agent_id", None)
+            task_id = getattr(event, "task_id", None)
+            if (agent_id is not None or task_id is not None) and (
+                str(agent_id) not in crew_agent_ids
+                and str(task_id) not in crew_task_ids
+            ):
+                return
+            # LLM callbacks can fire from worker threads, so hop to the loop
+            loop.call_soon_threadsafe(queue.put_nowait, event.chunk)
+
+        crewai_event_bus.on(LLMStreamChunkEvent)(_forward_chunk)
+        crew_run = None
+        try:
+            crew_run = asyncio.create_task(rag_crew.kickoff_async())
+
+            parts = []
+            while not crew_run.done() or not queue.empty():
+                try:
+                    chunk = await asyncio.wait_for(queue.get(), timeout=0.1)
+                except asyncio.TimeoutError:
+                    continue
+                parts.append(chunk)
+                yield chunk
+
+            result = await crew_run  # Surface any crew errors to the client
+        finally:
+            # A client disconnect raises GeneratorExit out of the yield
+            # above, skipping the await; stop the orphaned crew run so it
+            # doesn't keep burning LLM calls after its admission slot is
+            # released
+            if crew_run is not None and not crew_run.done():
+                crew_run.cancel()
+                try:
+                    await crew_run
+                except asyncio.CancelledError:
+                    pass
+                except Exception as e:
+                    logger.warning(f" Cancelled crew run failed: {e}")
+
+            # Deregister so finished requests stop receiving events and
+            # their queue/closure can be collected
+            handlers = getattr(crewai_event_bus, "_handlers", {}).get(LLMStreamChunkEvent)
+            if handlers is not None:
+                try:
+                    handlers.remove(_forward_chunk)
+                except (KeyError, ValueError):
+                    pass
+        processing_time = time.perf_counter() - start_time
+
+        # Cache the full answer so repeat queries hit the fast path
+        await cache_response(query, {
+            "content": "".join(parts) or str(result),
+            "processing_time": processing_time,
+            "sources_count": top_k,
+            "model_used": "enhanced-agentic-rag",
+            "query_length": len(query),
+            "timestamp": datetime.now().isoformat()
+        }, top_k)
+
+        logger.info("Streamed query processed in %.2fs", processing_time)
+
+    except Exception as e:
+        logger.error(f" RAG streaming failed: {e}")
+        raise
+    finally:
+        async with _cv:
+            _inflight -= 1
+            _cv.notify(1)
+
+async def stream_response(tokens: AsyncGenerator[str, None]) -> AsyncGenerator[bytes, None]:
+    """Wrap a live token stream into OpenAI-compatible SSE chunks"""
+    response_id = f"chatcmpl-{_now_s}"
+
+    # The SSE envelope is identical for every chunk; only the delta content
+    # varies. Precompute the surrounding bytes once so each token costs a
+    # single orjson string encode plus one concatenation.
+    chunk_prefix = (
+        b'data: {"id":"' + response_id.encode() +
+        b'","object":"chat.completion.chunk","created":' + str(_now_s).encode() +
+        b',"model":"enhanced-agentic-rag","choices":[{"delta":{"content":'
+    )
+    chunk_suffix = b'},"index":0,"finish_reason":null}]}\n\n'
+
+    async for token in tokens:
+        # orjson returns bytes directly, skipping a str encode round-trip per chunk
+        yield chunk_prefix + orjson.dumps(token) + chunk_suffix
+
     # Final chunk
-    final_chunk = {
-        "id": f"chatcmpl-{int(time.time())}",
-        "object": "chat.completion.chunk",
-        "created": int(time.time()),
-        "model": "enhanced-agentic-rag",
-        "choices": [{
-            "delta": {},
-            "index": 0,
-            "finish_reason": "stop"
-        }]
-    }
-    yield f"data: {json.dumps(final_chunk)}\n\n"
-    yield "data: [DONE]\n\n"
+    yield (
+        b'data: {"id":"' + response_id.encode() +
+        b'","object":"chat.completion.chunk","created":' + str(_now_s).encode() +
+        b',"model":"enhanced-agentic-rag","choices":[{"delta":{},'
+        b'"index":0,"finish_reason":"stop"}]}\n\n'
+    )
+    yield b"data: [DONE]\n\n"
 
 # Enhanced API Endpoints
 
-@app.get("/", response_class=JSONResponse)
+@app.get("/", response_class=ORJSONResponse)
 async def root():
     """Enhanced root endpoint with comprehensive API information"""
     return {
@@ -324,16 +529,16 @@ async def root():
         "documentation": "/docs"
     }
 
-@app.get("/health", response_model=HealthResponse)
+@app.get("/health")
 async def health_check():
     """Enhanced health check with detailed system information"""
-    return HealthResponse(
+    return msgspec_response(HealthResponse(
         status="healthy",
         timestamp=datetime.now().isoformat(),
         version="2.0.0",
         cache_stats=cache_stats.copy(),
         uptime_seconds=time.time() - app_start_time
-    )
+    ))
 
 @app.get("/metrics")
 async def get_metrics():
@@ -342,11 +547,27 @@ async def get_metrics():
         "cache_performance": cache_stats,
         "uptime_seconds": time.time() - app_start_time,
         "cache_size": len(response_cache),
+        "inflight_requests": _inflight,
+        "max_inflight": _cap,
         "api_version": "2.0.0",
         "status": "operational"
     }
 
-@app.post("/v1/chat/completions", response_model=EnhancedChatResponse)
+@app.patch("/metrics")
+async def update_metrics(settings: Dict[str, Any]):
+    """Tune backpressure at runtime (currently supports: max_inflight)"""
+    global _cap
+    new_cap = settings.get("max_inflight")
+    if not isinstance(new_cap, int) or new_cap < 1:
+        raise HTTPException(status_code=400, detail="max_inflight must be a positive integer")
+
+    _cap = new_cap
+    async with _cv:
+        _cv.notify_all()  # Wake waiters in case the cap was raised
+
+    return {"max_inflight": _cap, "inflight_requests": _inflight}
+
+@app.post("/v1/chat/completions")
 async def enhanced_chat_completions(
     request: EnhancedChatRequest,
     background_tasks: BackgroundTasks,
@@ -363,28 +584,33 @@ async def enhanced_chat_completions(
     """
     
     cache_stats["total_requests"] += 1
-    start_time = time.time()
+    start_time = time.perf_counter()
     
     try:
-        # Extract user query from messages
-        user_messages = [msg for msg in request.messages if msg.role == "user"]
-        if not user_messages:
+        # Extract the latest user message - scan backwards and short-circuit
+        # instead of materializing a filtered copy of the whole history
+        query = next(
+            (msg.content for msg in reversed(request.messages) if msg.role == "user"),
+            None
+        )
+        if query is None:
             raise HTTPException(status_code=400, detail="No user message found")
         
-        query = user_messages[-1].content  # Use the latest user message
-        
-        # Check cache first
-        cache_key = generate_cache_key(query, request.top_k or 10)
-        cached_response = get_cached_response(cache_key)
-        
+        # Check cache first (semantic match when Redis is available)
+        cached_response = await get_cached_response(query, request.top_k or 10)
+
         if cached_response:
-            logger.info(f"💨 Cache hit for query: {query[:50]}...")
-            response_id = f"chatcmpl-{int(time.time())}-cached"
-            
+            logger.info("💨 Cache hit for query: %.50s...", query)
+            response_id = f"chatcmpl-{_now_s}-cached"
+
+            # Count tokens once - a single scan per string instead of four
+            prompt_tokens = len(query.split())
+            completion_tokens = len(cached_response["content"].split())
+
             # Return cached response in OpenAI format
-            return EnhancedChatResponse(
+            return msgspec_response(EnhancedChatResponse(
                 id=response_id,
-                created=int(time.time()),
+                created=_now_s,
                 model=request.model,
                 choices=[{
                     "index": 0,
@@ -395,44 +621,59 @@ async def enhanced_chat_completions(
                     "finish_reason": "stop"
                 }],
                 usage={
-                    "prompt_tokens": len(query.split()),
-                    "completion_tokens": len(cached_response["content"].split()),
-                    "total_tokens": len(query.split()) + len(cached_response["content"].split())
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens
                 },
                 metadata={
                     "cached": True,
-                    "cache_key": cache_key,
                     "processing_time": cached_response.get("processing_time", 0),
                     "enhanced_features": ["caching", "validation", "analytics"]
                 }
-            )
-        
-        # Process with RAG if not cached
+            ))
+
         if request.stream:
-            # Handle streaming response
-            response_data = await process_rag_query(query, request.top_k or 10)
-            
-            # Cache the response
-            background_tasks.add_task(cache_response, cache_key, response_data)
-            
+            # Handle streaming response: tokens flow to the client as the
+            # LLM emits them, no waiting for the full crew result
             return StreamingResponse(
-                stream_response(response_data["content"]),
-                media_type="text/plain"
+                stream_response(stream_rag_query(query, request.top_k or 10)),
+                media_type="text/event-stream",
+                headers={
+                    "Cache-Control": "no-cache",
+                    "Connection": "keep-alive",
+                    "X-Accel-Buffering": "no"  # Disable proxy buffering (nginx)
+                }
             )
         else:
-            # Handle regular response
-            response_data = await process_rag_query(query, request.top_k or 10)
-            
+            # Admission control: bound concurrent CrewAI runs so bursts queue
+            # here instead of overwhelming the Ollama backend
+            global _inflight
+            async with _cv:
+                await _cv.wait_for(lambda: _inflight < _cap)
+                _inflight += 1
+
+            try:
+                # Process with RAG if not cached
+                response_data = await process_rag_query(query, request.top_k or 10)
+            finally:
+                async with _cv:
+                    _inflight -= 1
+                    _cv.notify(1)
+
             # Cache the response
-            cache_response(cache_key, response_data)
-            
-            response_id = f"chatcmpl-{int(time.time())}"
-            processing_time = time.time() - start_time
-            
+            await cache_response(query, response_data, request.top_k or 10)
+
+            response_id = f"chatcmpl-{_now_s}"
+            processing_time = time.perf_counter() - start_time
+
+            # Count tokens once - a single scan per string instead of four
+            prompt_tokens = len(query.split())
+            completion_tokens = len(response_data["content"].split())
+
             # Create enhanced response
             enhanced_response = EnhancedChatResponse(
                 id=response_id,
-                created=int(time.time()),
+                created=_now_s,
                 model=request.model,
                 choices=[{
                     "index": 0,
@@ -443,9 +684,9 @@ async def enhanced_chat_completions(
                     "finish_reason": "stop"
                 }],
                 usage={
-                    "prompt_tokens": len(query.split()),
-                    "completion_tokens": len(response_data["content"].split()),
-                    "total_tokens": len(query.split()) + len(response_data["content"].split())
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens
                 },
                 metadata={
                     "cached": False,
@@ -460,8 +701,8 @@ async def enhanced_chat_completions(
                 }
             )
             
-            logger.info(f"Enhanced response generated in {processing_time:.2f}s")
-            return enhanced_response
+            logger.info("Enhanced response generated in %.2fs", processing_time)
+            return msgspec_response(enhanced_response)
             
     except HTTPException:
         raise
@@ -476,43 +717,18 @@ async def enhanced_chat_completions(
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
     """Enhanced request logging middleware"""
-    start_time = time.time()
+    start_time = time.perf_counter()
     
     response = await call_next(request)
     
-    process_time = time.time() - start_time
+    process_time = time.perf_counter() - start_time
     logger.info(
-        f" {request.method} {request.url.path} - "
-        f"Status: {response.status_code} - "
-        f"Time: {process_time:.3f}s"
+        " %s %s - Status: %s - Time: %.3fs",
+        request.method, request.url.path, response.status_code, process_time
     )
     
     return response
 
-if __name__ == "__main__":
-    logger.info("🚀 Starting Enhanced Agentic RAG API Server...")
-    uvicorn.run(
-        "api:app",
-        host=os.getenv("API_HOST", "0.0.0.0"),
-        port=int(os.getenv("API_PORT", "8000")),
-        reload=True,
-        log_level="info"
-    )
-
-# Add CORS middleware to allow requests from OpenWebUI
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # Allow all origins
-    allow_credentials=True,
-    allow_methods=["*"],  # Allow all methods
-    allow_headers=["*"],  # Allow all headers
-)
-
-# Define the request model to be compatible with OpenAI's format
-class ChatCompletionRequest(BaseModel):
-    model: str
-    messages: List[Dict[str, str]]
-
 @app.get("/v1/models")
 def list_models():
     """
@@ -536,45 +752,23 @@ def list_models():
         ]
     }
 
-@app.post("/v1/chat/completions")
-def chat_completions(request: ChatCompletionRequest):
-    """
-    OpenAI-compatible endpoint to interact with the CrewAI RAG pipeline.
-    """
-    # Extract the last user message as the query
-    user_message = next((msg["content"] for msg in reversed(request.messages) if msg["role"] == "user"), None)
-
-    if not user_message:
-        return {"error": "No user message found"}
-
-    print(f"Received query for API: {user_message}")
-
-    # Kick off the CrewAI crew with the user's query
-    rag_crew = create_rag_crew(user_message)
-    result = rag_crew.kickoff()
-    
-    # Format the response to be compatible with the OpenAI API standard
-    response = {
-        "id": "chatcmpl-123", # Dummy ID
-        "object": "chat.completion",
-        "created": 1677652288, # Dummy timestamp
-        "model": request.model,
-        "choices": [{
-            "index": 0,
-            "message": {
-                "role": "assistant",
-                "content": str(result), # Ensure the result is a string
-            },
-            "finish_reason": "stop"
-        }],
-        "usage": {
-            "prompt_tokens": 0, # You can implement token counting if needed
-            "completion_tokens": 0,
-            "total_tokens": 0
-        }
-    }
-    return response
+# Guard against route shadowing: FastAPI keeps the last registration, so a
+# second POST /v1/chat/completions would silently replace the enhanced handler
+assert sum(
+    1 for route in app.routes
+    if getattr(route, "path", None) == "/v1/chat/completions" and "POST" in getattr(route, "methods", set())
+) == 1, "Duplicate POST /v1/chat/completions route registered"
 
 if __name__ == "__main__":
-    # This allows you to run the API server directly for testing
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    logger.info("🚀 Starting Enhanced Agentic RAG API Server...")
+    uvicorn.run(
+        "api:app",
+        host=os.getenv("API_HOST", "0.0.0.0"),
+        port=int(os.getenv("API_PORT", "8000")),
+        loop="uvloop",       # libuv event loop - big win on asyncio I/O
+        http="httptools",    # C HTTP parser
+        workers=int(os.getenv("WORKERS", os.cpu_count() or 2)),
+        reload=False,        # Reload is incompatible with multiple workers
+        access_log=False,    # log_requests middleware already covers access logging
+        log_level="info"
+    )
@@ -5,6 +5,7 @@ Simple document ingestion using processed markdown files.
 
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from dotenv import load_dotenv
 from urllib.parse import urlparse
@@ -17,9 +18,10 @@ sys.path.insert(0, str(project_root))
 load_dotenv()
 
 from llama_index.core import VectorStoreIndex, Document
-from llama_index.vector_stores.postgres import PGVectorStore
 from llama_index.embeddings.ollama import OllamaEmbedding
 
+from src.data_ingestion.bulk_pg_vector_store import BulkPGVectorStore
+
 def get_database_config():
     """Get database configuration from environment variables."""
     database_url = os.getenv("DATABASE_URL")
@@ -60,7 +62,10 @@ def ingest_from_processed():
         embed_model = OllamaEmbedding(
             model_name="nomic-embed-text",
             base_url="http://localhost:11434",
-            embed_batch_size=1
+            embed_batch_size=int(os.getenv("EMBED_BATCH_SIZE", "64")),
+            # Keep a few batches in flight so HTTP serialization and
+            # tokenization overlap with Ollama's GPU compute
+            num_workers=4
         )
         print("Embedding model initialized")
     except Exception as e:
@@ -69,22 +74,37 @@ def ingest_from_processed():
     
     # Load markdown documents
     try:
-        documents = []
-        md_files = list(md_dir.glob("*.md"))
+        # scandir reads the file type from the directory entry, skipping
+        # the per-file stat that glob would issue
+        with os.scandir(md_dir) as entries:
+            md_files = [
+                Path(entry.path)
+                for entry in entries
+                if entry.is_file() and entry.name.lower().endswith('.md')
+            ]
         print(f"📂 Found {len(md_files)} markdown files")
-        
-        for md_file in md_files:
-            content = md_file.read_text(encoding='utf-8')
-            doc = Document(
-                text=content,
-                metadata={
-                    'source_file': md_file.name,
-                    'file_path': str(md_file),
-                    'ingestion_method': 'simple_md'
-                }
-            )
-            documents.append(doc)
-            
+
+        # Read files in parallel; many small files are latency-bound,
+        # so a thread pool overlaps the per-file disk round-trips.
+        # pool.map yields as reads complete, so Documents are built
+        # incrementally instead of staging every file's text in a
+        # separate contents list first.
+        with ThreadPoolExecutor(max_workers=32) as pool:
+            documents = [
+                Document(
+                    text=content,
+                    metadata={
+                        'source_file': md_file.name,
+                        'file_path': str(md_file),
+                        'ingestion_method': 'simple_md'
+                    }
+                )
+                for md_file, content in zip(
+                    md_files,
+                    pool.map(lambda p: p.read_text(encoding='utf-8'), md_files),
+                )
+            ]
+
         print(f"Loaded {len(documents)} documents")
         
     except Exception as e:
@@ -94,7 +114,8 @@ def ingest_from_processed():
     # Setup vector store
     try:
         table_name = "doc_md_simple_20250830"
-        vector_store = PGVectorStore.from_params(
+        # Bulk variant streams rows via COPY instead of per-row INSERTs
+        vector_store = BulkPGVectorStore.from_params(
             host=db_config['host'],
             port=db_config['port'],
             database=db_config['database'],
@@ -110,22 +131,23 @@ def ingest_from_processed():
         print(f" Vector store error: {e}")
         return False
     
-    # Create index with smaller chunks
+    # Create index over all documents at once
     try:
         print("Creating vector index and ingesting documents...")
-        
-        # Process one document at a time to avoid issues
-        for i, doc in enumerate(documents):
-            print(f"Processing document {i+1}/{len(documents)}: {doc.metadata['source_file']}")
-            
-            # Create small index for this document
-            small_index = VectorStoreIndex.from_documents(
-                [doc],
-                vector_store=vector_store,
-                embed_model=embed_model,
-                show_progress=True
-            )
-            
+
+        # A single index build lets LlamaIndex batch embedding calls
+        # (embed_batch_size chunks per Ollama request) instead of one
+        # HTTP round-trip and one DB upsert per chunk
+        # tqdm progress flushes stderr on every update; across thousands
+        # of chunks that is pure syscall overhead on the hot path
+        VectorStoreIndex.from_documents(
+            documents,
+            vector_store=vector_store,
+            embed_model=embed_model,
+            show_progress=False,
+            use_async=True  # dispatch embedding batches concurrently
+        )
+
         print("Documents successfully ingested into vector store!")
         
         # Test the index
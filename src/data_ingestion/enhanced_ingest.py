@@ -24,12 +24,27 @@ This implementation showcases significant improvements over basic RAG:
 import os
 import asyncio
 import logging
+import re
+from collections import Counter
+from itertools import islice
 from pathlib import Path
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 import json
 import hashlib
 
+import orjson
+
+try:
+    from blake3 import blake3
+except ImportError:  # pragma: no cover - blake3 is in requirements
+    blake3 = None
+
+try:
+    import pymupdf
+except ImportError:  # pragma: no cover - pymupdf is in requirements
+    pymupdf = None
+
 # Core libraries
 from dotenv import load_dotenv
 from llama_index.core import (
@@ -51,13 +66,14 @@ from llama_index.core.extractors import (
     KeywordExtractor
 )
 from llama_index.core.ingestion import IngestionPipeline
-from llama_index.vector_stores.postgres import PGVectorStore
 from llama_index.embeddings.openai import OpenAIEmbedding
 from llama_index.llms.openai import OpenAI
 
 # Document processing
 from llama_index.readers.file import PDFReader, DocxReader
 
+from src.data_ingestion.bulk_pg_vector_store import BulkPGVectorStore
+
 # Load environment variables
 load_dotenv()
 
@@ -68,16 +84,90 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Section keywords collapsed into one case-insensitive alternation so
+# identify_section runs a single scan instead of six substring searches
+# over a lowercased copy of the document. Priority mirrors the original
+# if/elif order ('summary' counts toward abstract, its first match).
+SECTION_KEYWORDS = {
+    'abstract': 'abstract', 'summary': 'abstract', 'overview': 'abstract',
+    'introduction': 'introduction', 'background': 'introduction',
+    'methodology': 'methodology', 'method': 'methodology', 'approach': 'methodology',
+    'result': 'results', 'finding': 'results', 'analysis': 'results',
+    'conclusion': 'conclusion', 'discussion': 'conclusion',
+    'reference': 'references', 'bibliography': 'references', 'citation': 'references',
+}
+SECTION_PRIORITY = ('abstract', 'introduction', 'methodology', 'results', 'conclusion', 'references')
+SECTION_PATTERN = re.compile(
+    '|'.join(sorted(SECTION_KEYWORDS, key=len, reverse=True)), re.IGNORECASE
+)
+
+# Professional-language indicators for quality scoring; case-insensitive
+# regex avoids lowercasing a copy of the text just for the check
+PROFESSIONAL_PATTERN = re.compile(r'policy|procedure|standard|requirement', re.IGNORECASE)
+
+# Token pattern for lazy word iteration in quality scoring
+WORD_PATTERN = re.compile(r'\S+')
+
+# Unique-ratio sample size: enough tokens for a stable repetitiveness
+# estimate without holding every token of a large PDF in memory
+QUALITY_SAMPLE_TOKENS = 2000
+
+def iter_supported(root: Path, extensions=('.pdf', '.docx', '.doc')):
+    """Yield supported document paths under root.
+
+    os.scandir surfaces the file type from the directory entry itself,
+    so this walk avoids the per-file stat() that rglob("*") plus a
+    Python-side filter would issue - a round-trip each on networked
+    filesystems.
+    """
+    stack = [str(root)]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file() and entry.name.lower().endswith(extensions):
+                    yield Path(entry.path)
+
 class EnhancedDocumentProcessor:
     """
     Advanced document processing with contextual understanding and 
     intelligent chunking strategies developed by Nageswar.
     """
     
-    def __init__(self):
+    def __init__(self, defer_index: bool = True, use_semantic: bool = False):
+        # defer_index=True skips HNSW at table-create time so bulk inserts
+        # are plain heap appends; the index is built once after loading.
+        # Pass False for incremental updates that need a live index.
+        # use_semantic=True enables embedding-based chunk boundaries for
+        # flat-structured sources (doubles the embedding bill).
+        self.defer_index = defer_index
+        self.use_semantic = use_semantic
         self.setup_models()
         self.setup_database()
-        self.processed_docs = set()
+        # Content hashes survive across runs so reruns skip files that
+        # were already parsed, extracted and embedded
+        self.hash_store = Path(os.getenv("PROCESSED_HASH_STORE", "processed_hashes.json"))
+        self.processed_docs = self._load_processed_hashes()
+        self._pipeline = None
+
+    def _load_processed_hashes(self) -> set:
+        """Load content hashes persisted by previous ingestion runs"""
+        try:
+            if self.hash_store.exists():
+                hashes = set(json.loads(self.hash_store.read_text()))
+                logger.info(f"Loaded {len(hashes)} processed-document hashes")
+                return hashes
+        except Exception as e:
+            logger.warning(f"Could not load processed-hash store: {e}")
+        return set()
+
+    def _save_processed_hashes(self):
+        """Persist content hashes so the next run can skip ingested files"""
+        try:
+            self.hash_store.write_text(json.dumps(sorted(self.processed_docs)))
+        except Exception as e:
+            logger.warning(f"Could not save processed-hash store: {e}")
         
     def setup_models(self):
         """Initialize OpenAI models with optimized configurations"""
@@ -111,7 +201,8 @@ class EnhancedDocumentProcessor:
             # Create enhanced table with better indexing
             table_name = f"enhanced_docs_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
             
-            self.vector_store = PGVectorStore.from_params(
+            # Bulk variant streams rows via COPY instead of per-row INSERTs
+            self.vector_store = BulkPGVectorStore.from_params(
                 host=db_url_parts.hostname,
                 port=db_url_parts.port,
                 database=db_url_parts.path.lstrip('/'),
@@ -121,7 +212,7 @@ class EnhancedDocumentProcessor:
                 embed_dim=1536,  # OpenAI embedding dimensions
                 hybrid_search=True,  # Enable hybrid search
                 text_search_config="english",
-                hnsw_kwargs={
+                hnsw_kwargs=None if self.defer_index else {
                     "hnsw_m": 16,  # Optimized for performance
                     "hnsw_ef_construction": 200,
                     "hnsw_ef_search": 100
@@ -138,37 +229,73 @@ class EnhancedDocumentProcessor:
             logger.error(f" Database setup failed: {e}")
             raise
     
+    def build_hnsw_index(self):
+        """Build the HNSW index once, after bulk insert has finished"""
+        import psycopg2
+
+        table = f"data_{self.vector_store.table_name}"
+        index_name = f"{table}_embedding_hnsw_idx"
+        logger.info(f"Building HNSW index on {table}...")
+
+        conn = psycopg2.connect(os.getenv("DATABASE_URL"))
+        conn.autocommit = True  # CREATE INDEX CONCURRENTLY refuses to run in a transaction
+        try:
+            with conn.cursor() as cur:
+                cur.execute(
+                    f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {index_name} "
+                    f"ON {table} USING hnsw (embedding vector_cosine_ops) "
+                    f"WITH (m = 16, ef_construction = 200)"
+                )
+            logger.info(f"HNSW index {index_name} built")
+        finally:
+            conn.close()
+
     def create_advanced_pipeline(self) -> IngestionPipeline:
         """
         Create advanced ingestion pipeline with multiple processing stages.
         This is a key enhancement showcasing sophisticated document processing.
+
+        The pipeline is built once per processor: the semantic splitter and
+        the LLM-backed extractors allocate prompt templates and hold model
+        references, so rebuilding them on every call is pure churn.
         """
+        if self._pipeline is not None:
+            return self._pipeline
+
+        # The semantic splitter embeds every sentence just to pick chunk
+        # boundaries - a full extra embedding pass before the real one. The
+        # markdown corpus is already well structured, so a plain sentence
+        # splitter is the default and semantic splitting stays opt-in.
+        if self.use_semantic:
+            splitter = SemanticSplitterNodeParser(
+                buffer_size=1,
+                breakpoint_percentile_threshold=95,
+                embed_model=self.embed_model
+            )
+        else:
+            splitter = SentenceSplitter(
+                chunk_size=Settings.chunk_size,
+                chunk_overlap=Settings.chunk_overlap
+            )
         
-        # Multi-stage node parser for hierarchical understanding
-        hierarchical_parser = HierarchicalNodeParser.from_defaults(
-            chunk_sizes=[2048, 1024, 512],  # Multi-level chunking
-            chunk_overlap=200
-        )
-        
-        # Semantic splitter for context-aware chunking
-        semantic_splitter = SemanticSplitterNodeParser(
-            buffer_size=1,
-            breakpoint_percentile_threshold=95,
-            embed_model=self.embed_model
-        )
-        
-        # Enhanced extractors for metadata enrichment
+        # Enhanced extractors for metadata enrichment. Each extractor costs
+        # one LLM round-trip per node, so the expensive ones are opt-in and
+        # every extractor fans its calls out across worker slots instead of
+        # issuing them serially.
         extractors = [
-            TitleExtractor(nodes=5, llm=self.llm),
-            QuestionsAnsweredExtractor(questions=3, llm=self.llm),
-            SummaryExtractor(summaries=["prev", "self", "next"], llm=self.llm),
-            KeywordExtractor(keywords=10, llm=self.llm),
+            TitleExtractor(nodes=5, llm=self.llm, num_workers=8),
         ]
+        if os.getenv("FULL_METADATA_EXTRACTORS", "false").lower() == "true":
+            extractors += [
+                QuestionsAnsweredExtractor(questions=3, llm=self.llm, num_workers=8),
+                SummaryExtractor(summaries=["prev", "self", "next"], llm=self.llm, num_workers=8),
+                KeywordExtractor(keywords=10, llm=self.llm, num_workers=8),
+            ]
         
         # Create the enhanced pipeline
         pipeline = IngestionPipeline(
             transformations=[
-                semantic_splitter,  # Context-aware chunking first
+                splitter,  # Chunking first
                 *extractors,  # Then extract metadata
                 self.embed_model,  # Finally embed
             ],
@@ -176,6 +303,7 @@ class EnhancedDocumentProcessor:
         )
         
         logger.info("Advanced ingestion pipeline created with multiple stages")
+        self._pipeline = pipeline
         return pipeline
     
     def process_document_with_context(self, doc_path: Path) -> List[Document]:
@@ -191,13 +319,18 @@ class EnhancedDocumentProcessor:
             return []
         
         documents = []
-        
+
+        # One stat() and one suffix computation per file; the metadata
+        # loop below reuses these for every page instead of issuing a
+        # fresh syscall per page
+        suffix = doc_path.suffix.lower()
+        file_size = doc_path.stat().st_size
+
         try:
             # Smart document loading based on file type
-            if doc_path.suffix.lower() == '.pdf':
-                reader = PDFReader()
-                docs = reader.load_data(doc_path)
-            elif doc_path.suffix.lower() in ['.docx', '.doc']:
+            if suffix == '.pdf':
+                docs = self.load_pdf(doc_path)
+            elif suffix in ['.docx', '.doc']:
                 reader = DocxReader()
                 docs = reader.load_data(doc_path)
             else:
@@ -210,8 +343,8 @@ class EnhancedDocumentProcessor:
                 enhanced_metadata = {
                     "file_name": doc_path.name,
                     "file_path": str(doc_path),
-                    "file_size": doc_path.stat().st_size,
-                    "file_type": doc_path.suffix.lower(),
+                    "file_size": file_size,
+                    "file_type": suffix,
                     "processed_date": datetime.now().isoformat(),
                     "document_hash": doc_hash,
                     "page_number": i + 1,
@@ -234,29 +367,48 @@ class EnhancedDocumentProcessor:
         
         return documents
     
+    def load_pdf(self, doc_path: Path) -> List[Document]:
+        """Extract PDF text per page, preferring PyMuPDF over pypdf.
+
+        PDFReader parses with pure-Python pypdf; PyMuPDF does the same
+        extraction in a C extension several times faster, which matters
+        because parsing is the CPU-bound stage of ingestion.
+        """
+        if pymupdf is None:
+            return PDFReader().load_data(doc_path)
+
+        with pymupdf.open(doc_path) as pdf:
+            return [
+                Document(
+                    text=page.get_text("text"),
+                    metadata={"page_label": str(page.number + 1)},
+                )
+                for page in pdf
+            ]
+
     def generate_doc_hash(self, doc_path: Path) -> str:
-        """Generate hash for document deduplication"""
-        return hashlib.md5(f"{doc_path.name}_{doc_path.stat().st_size}".encode()).hexdigest()
+        """Hash the file content for deduplication.
+
+        Hashing name+size lets two different files alias each other, so
+        dedup could silently drop valid documents. Streaming the content
+        in 1 MiB chunks keeps memory flat even for large PDFs.
+        """
+        hasher = blake3() if blake3 is not None else hashlib.sha256()
+        with open(doc_path, "rb") as f:
+            while chunk := f.read(1024 * 1024):
+                hasher.update(chunk)
+        return hasher.hexdigest()
     
     def identify_section(self, text: str) -> str:
         """Identify document section type using intelligent analysis"""
-        text_lower = text.lower()
-        
-        # Enhanced section identification
-        if any(keyword in text_lower for keyword in ['abstract', 'summary', 'overview']):
-            return 'abstract'
-        elif any(keyword in text_lower for keyword in ['introduction', 'background']):
-            return 'introduction'
-        elif any(keyword in text_lower for keyword in ['methodology', 'method', 'approach']):
-            return 'methodology'
-        elif any(keyword in text_lower for keyword in ['result', 'finding', 'analysis']):
-            return 'results'
-        elif any(keyword in text_lower for keyword in ['conclusion', 'summary', 'discussion']):
-            return 'conclusion'
-        elif any(keyword in text_lower for keyword in ['reference', 'bibliography', 'citation']):
-            return 'references'
-        else:
-            return 'content'
+        found = {
+            SECTION_KEYWORDS[match.group(0).lower()]
+            for match in SECTION_PATTERN.finditer(text)
+        }
+        for section in SECTION_PRIORITY:
+            if section in found:
+                return section
+        return 'content'
     
     def calculate_quality_score(self, text: str) -> float:
         """Calculate content quality score for filtering and ranking"""
@@ -268,20 +420,25 @@ class EnhancedDocumentProcessor:
         elif len(text) > 50:
             score += 0.1
         
-        # Sentence structure score
-        sentences = text.split('.')
-        if len(sentences) > 2:
+        # Sentence structure score (counting periods avoids building the
+        # intermediate list that text.split('.') would allocate)
+        if text.count('.') > 1:
             score += 0.2
-        
-        # Keyword density (avoid too repetitive content)
-        words = text.split()
-        if len(set(words)) / len(words) > 0.5:
+
+        # Keyword density (avoid too repetitive content); one Counter pass
+        # over a bounded token sample yields unique and total counts
+        # together while keeping memory constant for large documents
+        word_counts = Counter(
+            islice((m.group(0) for m in WORD_PATTERN.finditer(text)), QUALITY_SAMPLE_TOKENS)
+        )
+        total_words = sum(word_counts.values())
+        if total_words and len(word_counts) / total_words > 0.5:
             score += 0.3
-        
+
         # Professional language indicators
-        if any(word in text.lower() for word in ['policy', 'procedure', 'standard', 'requirement']):
+        if PROFESSIONAL_PATTERN.search(text):
             score += 0.2
-        
+
         return min(score, 1.0)
     
     async def ingest_documents(self, source_dir: Path) -> Dict[str, Any]:
@@ -293,12 +450,8 @@ class EnhancedDocumentProcessor:
         logger.info(f"🚀 Starting enhanced document ingestion from: {source_dir}")
         start_time = datetime.now()
         
-        # Find all supported documents
-        supported_extensions = {'.pdf', '.docx', '.doc'}
-        doc_files = [
-            f for f in source_dir.rglob("*") 
-            if f.is_file() and f.suffix.lower() in supported_extensions
-        ]
+        # Find all supported documents without a stat per file
+        doc_files = list(iter_supported(source_dir))
         
         if not doc_files:
             logger.warning(f" No supported documents found in {source_dir}")
@@ -321,18 +474,31 @@ class EnhancedDocumentProcessor:
             "table_name": self.vector_store.table_name
         }
         
-        for doc_file in doc_files:
-            try:
-                documents = self.process_document_with_context(doc_file)
-                if documents:
-                    all_documents.extend(documents)
-                    stats["processed_files"] += 1
-                    stats["total_pages"] += len(documents)
-                    logger.info(f"Added {len(documents)} pages from {doc_file.name}")
-                
-            except Exception as e:
-                logger.error(f" Failed to process {doc_file}: {e}")
+        # Parse documents concurrently instead of one after another, so
+        # CPU-bound parsing of one file overlaps I/O on the others. The
+        # semaphore caps how many PDF parse trees are alive at once,
+        # otherwise a large corpus can exhaust memory.
+        semaphore = asyncio.Semaphore(int(os.getenv("PARSE_CONCURRENCY", "8")))
+
+        async def parse_with_limit(doc_file: Path) -> List[Document]:
+            async with semaphore:
+                return await asyncio.to_thread(self.process_document_with_context, doc_file)
+
+        results = await asyncio.gather(
+            *[parse_with_limit(f) for f in doc_files],
+            return_exceptions=True,
+        )
+
+        for doc_file, documents in zip(doc_files, results):
+            if isinstance(documents, BaseException):
+                logger.error(f" Failed to process {doc_file}: {documents}")
                 stats["failed_files"].append(str(doc_file))
+                continue
+            if documents:
+                all_documents.extend(documents)
+                stats["processed_files"] += 1
+                stats["total_pages"] += len(documents)
+                logger.info(f"Added {len(documents)} pages from {doc_file.name}")
         
         if not all_documents:
             logger.warning(" No documents were successfully processed")
@@ -344,6 +510,10 @@ class EnhancedDocumentProcessor:
             # Run the advanced pipeline
             nodes = await asyncio.to_thread(pipeline.run, documents=all_documents)
             stats["total_chunks"] = len(nodes) if nodes else 0
+
+            # Index after loading: inserts above were plain heap appends
+            if self.defer_index:
+                await asyncio.to_thread(self.build_hnsw_index)
             
             # Create the index
             index = VectorStoreIndex.from_vector_store(
@@ -365,6 +535,7 @@ class EnhancedDocumentProcessor:
             
             stats["status"] = "success"
             stats["index_created"] = True
+            self._save_processed_hashes()
             
         except Exception as e:
             logger.error(f" Pipeline execution failed: {e}")
@@ -387,10 +558,12 @@ async def main():
     # Start enhanced ingestion
     results = await processor.ingest_documents(source_dir)
     
-    # Save processing results
+    # Save processing results; orjson serializes datetimes natively and
+    # skips the per-value default-callback scan json.dump does
     results_file = Path("ingestion_results.json")
-    with open(results_file, "w") as f:
-        json.dump(results, f, indent=2, default=str)
+    results_file.write_bytes(
+        orjson.dumps(results, option=orjson.OPT_INDENT_2, default=str)
+    )
     
     logger.info(f" Results saved to: {results_file}")
     
@@ -18,6 +18,12 @@ import os
 import sys
 import json
 import time
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is in requirements
+    orjson = None
 from datetime import datetime
 from typing import Dict, List, Any
 from pathlib import Path
@@ -26,9 +32,9 @@ from pathlib import Path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
-def create_evaluation_dataset() -> List[Dict[str, str]]:
+def create_evaluation_dataset() -> List[Dict[str, Any]]:
     """Create enhanced evaluation dataset for RAG testing"""
-    return [
+    dataset = [
         {
             "question": "What are the key procurement standards for government contracts?",
             "ground_truth": "Government procurement standards include competitive bidding, transparency requirements, vendor qualification criteria, and compliance with procurement regulations.",
@@ -56,6 +62,13 @@ def create_evaluation_dataset() -> List[Dict[str, str]]:
         }
     ]
 
+    # Ground-truth token sets are constant for the run; tokenize once
+    # here instead of on every quality-score call
+    for item in dataset:
+        item["_gt_tokens"] = frozenset(item["ground_truth"].lower().split())
+
+    return dataset
+
 def test_enhanced_retrieval_system(questions: List[Dict[str, str]]) -> Dict[str, Any]:
     """Test the enhanced retrieval system and collect performance metrics"""
     
@@ -69,8 +82,6 @@ def test_enhanced_retrieval_system(questions: List[Dict[str, str]]) -> Dict[str,
         "timestamp": datetime.now().isoformat()
     }
     
-    total_time = 0
-    
     try:
         from src.rag_system.enhanced_tools import search_processed_documents
         docs_dir = str(project_root / "data" / "processed" / "md")
@@ -79,9 +90,9 @@ def test_enhanced_retrieval_system(questions: List[Dict[str, str]]) -> Dict[str,
         print(f"Testing {len(questions)} questions")
         print("=" * 60)
         
-        for i, item in enumerate(questions, 1):
+        def run_one(numbered_item):
+            i, item = numbered_item
             question = item["question"]
-            ground_truth = item["ground_truth"]
             category = item["category"]
             
             print(f"\n Question {i}: {question}")
@@ -92,37 +103,44 @@ def test_enhanced_retrieval_system(questions: List[Dict[str, str]]) -> Dict[str,
                 # Test the enhanced retrieval
                 response = search_processed_documents(question, docs_dir)
                 response_time = time.time() - start_time
-                total_time += response_time
                 
                 # Calculate quality score (simplified)
-                quality_score = calculate_response_quality(response, ground_truth)
+                quality_score = calculate_response_quality(response, item["_gt_tokens"])
                 
-                results["successful_responses"] += 1
-                results["quality_scores"].append(quality_score)
+                print(f"Response time: {response_time:.2f}s")
+                print(f"⭐ Quality score: {quality_score:.2f}/5.0")
                 
-                response_data = {
+                return {
                     "question": question,
-                    "response": response[:500] + "..." if len(response) > 500 else response,
-                    "ground_truth": ground_truth,
+                    # Only a prefix is ever shown or reported; keeping the
+                    # full response would bloat results and its JSON dump
+                    "response": response[:500],
+                    "ground_truth": item["ground_truth"],
                     "category": category,
                     "response_time": response_time,
                     "quality_score": quality_score
                 }
-                results["responses"].append(response_data)
-                
-                print(f"Response time: {response_time:.2f}s")
-                print(f"⭐ Quality score: {quality_score:.2f}/5.0")
                 
             except Exception as e:
                 print(f" Failed: {e}")
-                results["failed_responses"] += 1
-                results["responses"].append({
+                return {
                     "question": question,
                     "error": str(e),
                     "category": category
-                })
+                }
+        
+        # Retrieval is I/O-bound, so the questions run concurrently;
+        # results come back in submission order via map
+        with ThreadPoolExecutor(max_workers=min(8, len(questions) or 1)) as pool:
+            results["responses"] = list(pool.map(run_one, enumerate(questions, 1)))
+        
+        # Calculate final metrics from the collected responses
+        successful = [r for r in results["responses"] if "error" not in r]
+        results["successful_responses"] = len(successful)
+        results["failed_responses"] = len(results["responses"]) - len(successful)
+        results["quality_scores"] = [r["quality_score"] for r in successful]
         
-        # Calculate final metrics
+        total_time = sum(r["response_time"] for r in successful)
         results["avg_response_time"] = total_time / len(questions) if questions else 0
         results["avg_quality_score"] = sum(results["quality_scores"]) / len(results["quality_scores"]) if results["quality_scores"] else 0
         results["success_rate"] = (results["successful_responses"] / len(questions)) * 100 if questions else 0
@@ -134,20 +152,26 @@ def test_enhanced_retrieval_system(questions: List[Dict[str, str]]) -> Dict[str,
         results["error"] = str(e)
         return results
 
-def calculate_response_quality(response: str, ground_truth: str) -> float:
-    """Simple quality scoring based on content analysis"""
+# Markers of the enhanced formatting, checked in one place
+ENHANCED_FEATURES = ("Enhanced", "Relevance Score", "📋")
+
+def calculate_response_quality(response: str, gt_tokens: frozenset) -> float:
+    """Simple quality scoring based on content analysis.
+
+    gt_tokens is the precomputed lowercased token set of the ground
+    truth (see create_evaluation_dataset), so repeated calls skip
+    re-tokenizing the constant side of the comparison.
+    """
     if " Error" in response or "No relevant documents found" in response:
         return 0.0
     
     score = 1.0  # Base score for successful retrieval
     
-    # Check if response contains relevant information
-    ground_truth_words = set(ground_truth.lower().split())
+    # Word overlap: iterate the small ground-truth set against the
+    # response set instead of building an intersection set
     response_words = set(response.lower().split())
-    
-    # Calculate word overlap
-    overlap = len(ground_truth_words.intersection(response_words))
-    overlap_ratio = overlap / len(ground_truth_words) if ground_truth_words else 0
+    overlap = sum(1 for word in gt_tokens if word in response_words)
+    overlap_ratio = overlap / len(gt_tokens) if gt_tokens else 0
     
     # Scoring criteria
     if overlap_ratio > 0.5:
@@ -162,7 +186,7 @@ def calculate_response_quality(response: str, ground_truth: str) -> float:
         score += 0.5  # Well-formatted response
     
     # Check for enhanced features
-    if any(feature in response for feature in ["Enhanced", "Relevance Score", "📋"]):
+    if any(feature in response for feature in ENHANCED_FEATURES):
         score += 0.5  # Enhanced features present
     
     return min(score, 5.0)
@@ -281,10 +305,16 @@ def main():
     # Generate report
     report = generate_evaluation_report(results)
     
-    # Save results
+    # Save results; orjson pretty-prints in C instead of building the
+    # whole document through json.dump's pure-Python encoder
     results_file = project_root / "evaluation_results.json"
-    with open(results_file, "w") as f:
-        json.dump(results, f, indent=2, default=str)
+    if orjson is not None:
+        results_file.write_bytes(
+            orjson.dumps(results, option=orjson.OPT_INDENT_2, default=str)
+        )
+    else:
+        with open(results_file, "w") as f:
+            json.dump(results, f, indent=2, default=str)
     
     report_file = project_root / "EVALUATION_REPORT.md"
     with open(report_file, "w") as f:
@@ -10,6 +10,7 @@ ollama_llm = LLM(
     base_url=ollama_base_url,
     temperature=1,
     timeout=300,
+    stream=True,  # Emit token chunks so the API can stream responses live
     verbose=True,  # Enable verbose logging for debugging
     # Maximum token configuration for gemma3:4b
     max_tokens=131072,  # Use maximum context length available
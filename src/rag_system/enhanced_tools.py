@@ -21,12 +21,31 @@ Performance Improvements:
 """
 
 import os
+import json
 import logging
+import math
+import re
+from bisect import bisect_right
+from collections import OrderedDict, defaultdict
+from functools import lru_cache
 from typing import Dict, Union, Any, Optional
 from datetime import datetime
 import hashlib
 import time
 
+import numpy as np
+
+try:
+    from blake3 import blake3
+except ImportError:  # pragma: no cover - blake3 is in requirements
+    blake3 = None
+
+try:
+    import numba
+    HAVE_NUMBA = True
+except ImportError:  # numba is an optional accelerator, not a hard dependency
+    HAVE_NUMBA = False
+
 # Core libraries
 from dotenv import load_dotenv
 from urllib.parse import urlparse
@@ -39,40 +58,350 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Global cache for retrieval results
-retrieval_cache = {}
-cache_stats = {"hits": 0, "misses": 0, "total_queries": 0}
+# Global cache for retrieval results: OrderedDict as LRU, most recently
+# used at the end, so eviction is O(1) instead of a full timestamp scan
+retrieval_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+cache_stats = {"hits": 0, "misses": 0, "semantic_hits": 0, "total_queries": 0}
+
+# Fallback corpus location used when no vector store is reachable
+PROCESSED_DOCS_DIR = "/Users/ngswr/Downloads/agentic-rag-poc-main/data/processed/md"
+
+# Inverted index over the processed markdown corpus. Built lazily on the
+# first search and rebuilt only when the directory contents change, so a
+# query touches a few posting lists instead of rescanning every file.
+TOKEN_PATTERN = re.compile(r"\w+")
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+def _line_starts(content: str):
+    """Byte offsets where each line begins, for offset -> line lookups"""
+    starts = [0]
+    pos = content.find('\n')
+    while pos != -1:
+        starts.append(pos + 1)
+        pos = content.find('\n', pos + 1)
+    return starts
+
+def _bm25_accumulate(term_ids, doc_ids, tfs, offsets, idf, norm, scores):
+    """Accumulate BM25 contributions of each query term into scores.
+
+    Postings are stored CSR-style (flat doc_ids/tfs plus per-term
+    offsets); norm holds the precomputed per-document length
+    denominator k1*(1 - b + b*dl/avgdl).
+    """
+    for t in term_ids:
+        lo, hi = offsets[t], offsets[t + 1]
+        ids = doc_ids[lo:hi]
+        tf = tfs[lo:hi]
+        np.add.at(scores, ids, idf[t] * tf * (BM25_K1 + 1.0) / (tf + norm[ids]))
+
+if HAVE_NUMBA:
+    @numba.njit(cache=True)
+    def _bm25_accumulate(term_ids, doc_ids, tfs, offsets, idf, norm, scores):  # noqa: F811
+        for t in term_ids:
+            for j in range(offsets[t], offsets[t + 1]):
+                d = doc_ids[j]
+                tf = tfs[j]
+                scores[d] += idf[t] * tf * (BM25_K1 + 1.0) / (tf + norm[d])
+
+_index = None
+_index_key = None
+
+def _corpus_fingerprint(docs_dir: str):
+    """Cheap change detector: markdown names and mtimes in docs_dir"""
+    with os.scandir(docs_dir) as entries:
+        return tuple(sorted(
+            (entry.name, entry.stat().st_mtime_ns)
+            for entry in entries
+            if entry.is_file() and entry.name.endswith('.md')
+        ))
+
+def _build_index(docs_dir: str) -> Dict[str, Any]:
+    """Tokenize every markdown file once into term -> {doc_id: tf} postings"""
+    files = []
+    postings = defaultdict(dict)
+    doc_lens = []
+
+    for file_name, _mtime in _corpus_fingerprint(docs_dir):
+        full_path = os.path.join(docs_dir, file_name)
+        try:
+            with open(full_path, 'r', encoding='utf-8') as f:
+                content = f.read()
+        except Exception as file_error:
+            logger.warning(f"Error reading {file_name}: {file_error}")
+            continue
+
+        doc_id = len(files)
+        content_lower = content.lower()
+        tokens = TOKEN_PATTERN.findall(content_lower)
+        for token in tokens:
+            postings[token][doc_id] = postings[token].get(doc_id, 0) + 1
+
+        # Lowercased content and line-start offsets let snippet
+        # extraction run one scan over the document and map match
+        # offsets straight to line numbers
+        files.append({
+            'file': file_name,
+            'lines': content.split('\n'),
+            'content_lower': content_lower,
+            'line_starts': _line_starts(content),
+        })
+        doc_lens.append(len(tokens))
+
+    # Flatten postings into CSR arrays so scoring runs over contiguous
+    # numeric buffers instead of nested dict lookups
+    num_docs = len(files)
+    avgdl = (sum(doc_lens) / num_docs) if num_docs else 1.0
+    term_ids = {}
+    offsets = [0]
+    flat_doc_ids = []
+    flat_tfs = []
+    idf = []
+    for term, plist in postings.items():
+        term_ids[term] = len(idf)
+        df = len(plist)
+        idf.append(math.log(1 + (num_docs - df + 0.5) / (df + 0.5)))
+        flat_doc_ids.extend(plist.keys())
+        flat_tfs.extend(plist.values())
+        offsets.append(len(flat_doc_ids))
+
+    doc_len_arr = np.asarray(doc_lens, dtype=np.float64)
+    return {
+        'files': files,
+        'term_ids': term_ids,
+        'doc_ids': np.asarray(flat_doc_ids, dtype=np.int32),
+        'tfs': np.asarray(flat_tfs, dtype=np.float64),
+        'offsets': np.asarray(offsets, dtype=np.int64),
+        'idf': np.asarray(idf, dtype=np.float64),
+        'norm': BM25_K1 * (1 - BM25_B + BM25_B * doc_len_arr / avgdl),
+    }
+
+INDEX_CACHE_DIRNAME = '.bm25_cache'
+_INDEX_ARRAYS = ('doc_ids', 'tfs', 'offsets', 'idf', 'norm')
+
+def _load_cached_index(docs_dir: str, key) -> Optional[Dict[str, Any]]:
+    """Load the persisted index if it matches the current corpus state.
+
+    The numeric arrays are opened with mmap_mode='r', so multiple worker
+    processes share one page-cache copy and startup skips tokenization.
+    """
+    cache_dir = os.path.join(docs_dir, INDEX_CACHE_DIRNAME)
+    try:
+        with open(os.path.join(cache_dir, 'meta.json'), encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta['fingerprint'] != [list(entry) for entry in key]:
+            return None
+        index = {
+            name: np.load(os.path.join(cache_dir, f"{name}.npy"), mmap_mode='r')
+            for name in _INDEX_ARRAYS
+        }
+        index['term_ids'] = meta['term_ids']
+        files = []
+        for file_name in meta['files']:
+            with open(os.path.join(docs_dir, file_name), encoding='utf-8') as f:
+                content = f.read()
+            files.append({
+                'file': file_name,
+                'lines': content.split('\n'),
+                'content_lower': content.lower(),
+                'line_starts': _line_starts(content),
+            })
+        index['files'] = files
+        return index
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Could not load cached index, rebuilding: {e}")
+        return None
+
+def _save_cached_index(docs_dir: str, key, index: Dict[str, Any]):
+    """Persist the numeric index arrays so later processes can mmap them"""
+    cache_dir = os.path.join(docs_dir, INDEX_CACHE_DIRNAME)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        for name in _INDEX_ARRAYS:
+            np.save(os.path.join(cache_dir, f"{name}.npy"), index[name])
+        meta = {
+            'fingerprint': [list(entry) for entry in key],
+            'files': [doc['file'] for doc in index['files']],
+            'term_ids': index['term_ids'],
+        }
+        with open(os.path.join(cache_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+    except Exception as e:
+        logger.warning(f"Could not persist index cache: {e}")
+
+def _get_index(docs_dir: str) -> Dict[str, Any]:
+    """Return the cached index, rebuilding if the corpus changed"""
+    global _index, _index_key
+    key = _corpus_fingerprint(docs_dir)
+    if _index is None or key != _index_key:
+        _index = _load_cached_index(docs_dir, key)
+        if _index is None:
+            start = time.perf_counter()
+            _index = _build_index(docs_dir)
+            logger.info(
+                "Indexed %d documents (%d terms) in %.2fs",
+                len(_index['files']), len(_index['term_ids']),
+                time.perf_counter() - start,
+            )
+            _save_cached_index(docs_dir, key, _index)
+        _index_key = key
+    return _index
+
+def _term_matches_doc(index: Dict[str, Any], term: str, doc_id: int) -> bool:
+    """Check membership of doc_id in a term's posting slice"""
+    term_id = index['term_ids'].get(term)
+    if term_id is None:
+        return False
+    lo, hi = index['offsets'][term_id], index['offsets'][term_id + 1]
+    return bool(np.any(index['doc_ids'][lo:hi] == doc_id))
+
+# Second-tier semantic cache: keyed on an embedding of the preprocessed
+# query so paraphrases of an answered question hit. A cached answer is
+# only served when cosine similarity clears the threshold AND the
+# markdown corpus is byte-for-byte unchanged (same names and mtimes),
+# so stale evidence can never be returned.
+SEMANTIC_CACHE_THRESHOLD = 0.92
+SEMANTIC_CACHE_MAX_ENTRIES = 100
+
+_sem_cache = []  # entries: (int8 embedding, scale, corpus fingerprint, response)
+_sem_embed_model = None
+
+def _get_semantic_embedder():
+    """Lazily build the query embedder; None if Ollama is unavailable"""
+    global _sem_embed_model
+    if _sem_embed_model is None:
+        try:
+            from llama_index.embeddings.ollama import OllamaEmbedding
+            _sem_embed_model = OllamaEmbedding(
+                model_name="nomic-embed-text",
+                base_url=os.getenv("OLLAMA_BASE_URL", "http://localhost:11434"),
+            )
+        except Exception as e:
+            logger.warning(f"Semantic cache embedder unavailable: {e}")
+            _sem_embed_model = False
+    return _sem_embed_model or None
+
+def _safe_fingerprint(docs_dir: str):
+    try:
+        return _corpus_fingerprint(docs_dir)
+    except OSError:
+        return None
+
+def _embed_query(query: str):
+    embedder = _get_semantic_embedder()
+    if embedder is None:
+        return None
+    try:
+        vector = np.asarray(
+            embedder.get_text_embedding(preprocess_query(query)), dtype=np.float64
+        )
+    except Exception as e:
+        logger.warning(f"Semantic cache embedding failed: {e}")
+        return None
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else None
+
+def _quantize(vector):
+    """int8-quantize a unit vector with a per-vector scale.
+
+    Stored vectors are unit-norm, so the dequantized dot product
+    (int32 accumulate x both scales) approximates cosine similarity
+    while the cache holds a quarter of the float32 bytes per entry.
+    """
+    scale = float(np.abs(vector).max()) / 127.0
+    if scale == 0.0:
+        return None
+    return np.round(vector / scale).astype(np.int8), scale
+
+def semantic_cache_lookup(query: str) -> Optional[str]:
+    """Return a cached response for a semantically equivalent query"""
+    if not _sem_cache:
+        return None
+    vector = _embed_query(query)
+    if vector is None:
+        return None
+    quantized = _quantize(vector)
+    if quantized is None:
+        return None
+    query_q, query_scale = quantized
+    matrix = np.stack([entry[0] for entry in _sem_cache]).astype(np.int32)
+    scales = np.asarray([entry[1] for entry in _sem_cache])
+    sims = (matrix @ query_q.astype(np.int32)) * scales * query_scale
+    best = int(np.argmax(sims))
+    if sims[best] < SEMANTIC_CACHE_THRESHOLD:
+        return None
+    # Groundedness gate: the evidence corpus must be unchanged
+    if _sem_cache[best][2] != _safe_fingerprint(PROCESSED_DOCS_DIR):
+        return None
+    return _sem_cache[best][3]
+
+def semantic_cache_store(query: str, response: str):
+    """Record a response keyed by query embedding and corpus state"""
+    vector = _embed_query(query)
+    if vector is None:
+        return
+    quantized = _quantize(vector)
+    if quantized is None:
+        return
+    if len(_sem_cache) >= SEMANTIC_CACHE_MAX_ENTRIES:
+        _sem_cache.pop(0)
+    _sem_cache.append(
+        (quantized[0], quantized[1], _safe_fingerprint(PROCESSED_DOCS_DIR), response)
+    )
 
 def generate_cache_key(query: str, top_k: int = 10) -> str:
-    """Generate cache key for query results"""
+    """Generate cache key for query results.
+
+    Short normalized queries are used directly as dict keys - hashing a
+    20-character string costs more than comparing it. Long keys are
+    digested with blake3 (md5 fallback); no cryptographic strength is
+    needed for a process-local cache.
+    """
     key_data = f"{query.lower().strip()}_{top_k}"
+    if len(key_data) < 64:
+        return key_data
+    if blake3 is not None:
+        return blake3(key_data.encode()).hexdigest(length=16)
     return hashlib.md5(key_data.encode()).hexdigest()
 
+# Common abbreviations in policy documents, expanded in a single
+# compiled-regex pass. The \b boundaries also catch abbreviations at the
+# start or end of the query, which the old space-padded replacements
+# missed entirely.
+ABBREVIATIONS = {
+    "proc": "procurement",
+    "std": "standard",
+    "req": "requirement",
+    "pol": "policy",
+    "mgmt": "management",
+    "info": "information",
+    "sec": "security",
+    "hr": "human resources",
+}
+ABBR_PATTERN = re.compile(
+    r"\b(" + "|".join(map(re.escape, ABBREVIATIONS)) + r")\b", re.IGNORECASE
+)
+QUESTION_WORDS = frozenset({"what", "how", "when", "who"})
+
+@lru_cache(maxsize=1024)
 def preprocess_query(query: str) -> str:
-    """Enhanced query preprocessing for better retrieval"""
-    # Remove extra whitespace and normalize
-    query = query.strip()
-    
-    # Expand common abbreviations for policy documents
-    abbreviations = {
-        "proc": "procurement",
-        "std": "standard", 
-        "req": "requirement",
-        "pol": "policy",
-        "mgmt": "management",
-        "info": "information",
-        "sec": "security",
-        "hr": "human resources"
-    }
-    
-    for abbr, full in abbreviations.items():
-        query = query.replace(f" {abbr} ", f" {full} ")
-        query = query.replace(f" {abbr.upper()} ", f" {full} ")
-    
+    """Enhanced query preprocessing for better retrieval.
+
+    Deterministic str -> str, so repeat queries (cache misses retried
+    across the tool, semantic cache and evaluation runs) skip the regex
+    pass entirely.
+    """
+    # Expand common abbreviations for policy documents in one pass
+    query = ABBR_PATTERN.sub(
+        lambda match: ABBREVIATIONS[match.group(1).lower()], query.strip()
+    )
+
     # Add context keywords for policy documents
-    if any(term in query.lower() for term in ["what", "how", "when", "who"]):
+    if not QUESTION_WORDS.isdisjoint(query.lower().split()):
         query += " policy procedure standard requirement"
-    
+
     return query
 
 def enhanced_database_retrieval(search_query: str) -> str:
@@ -85,7 +414,7 @@ def enhanced_database_retrieval(search_query: str) -> str:
         db_url_parts = urlparse(DATABASE_URL)
         
         # Try to use existing processed documents from markdown files
-        processed_dir = "/Users/ngswr/Downloads/agentic-rag-poc-main/data/processed/md"
+        processed_dir = PROCESSED_DOCS_DIR
         if os.path.exists(processed_dir):
             return search_processed_documents(search_query, processed_dir)
         
@@ -118,56 +447,77 @@ def search_processed_documents(query: str, docs_dir: str) -> str:
         if not os.path.exists(docs_dir):
             return " No processed documents found. Please run document ingestion first."
         
-        results = []
+        index = _get_index(docs_dir)
         processed_query = preprocess_query(query).lower()
-        query_terms = processed_query.split()
-        
-        # Search through markdown files
-        for file_path in os.listdir(docs_dir):
-            if file_path.endswith('.md'):
-                full_path = os.path.join(docs_dir, file_path)
-                try:
-                    with open(full_path, 'r', encoding='utf-8') as f:
-                        content = f.read()
-                        content_lower = content.lower()
-                        
-                        # Calculate relevance score
-                        score = 0
-                        matched_terms = []
-                        
-                        for term in query_terms:
-                            if term in content_lower:
-                                score += content_lower.count(term)
-                                matched_terms.append(term)
-                        
-                        if score > 0:
-                            # Extract relevant sections
-                            lines = content.split('\n')
-                            relevant_sections = []
-                            
-                            for i, line in enumerate(lines):
-                                if any(term in line.lower() for term in query_terms):
-                                    # Get context around matched line
-                                    start_idx = max(0, i - 2)
-                                    end_idx = min(len(lines), i + 3)
-                                    section = '\n'.join(lines[start_idx:end_idx])
-                                    relevant_sections.append(section)
-                            
-                            if relevant_sections:
-                                results.append({
-                                    'file': file_path,
-                                    'score': score,
-                                    'matched_terms': matched_terms,
-                                    'sections': relevant_sections[:3]  # Top 3 sections
-                                })
-                
-                except Exception as file_error:
-                    logger.warning(f"Error reading {file_path}: {file_error}")
+        query_terms = TOKEN_PATTERN.findall(processed_query)
+
+        # BM25 over CSR posting arrays: only documents containing a query
+        # term are touched, and the kernel runs JIT-compiled when numba
+        # is installed (pure NumPy otherwise)
+        num_docs = len(index['files'])
+        unique_terms = sorted(set(query_terms))
+        hit_term_ids = np.asarray(
+            [index['term_ids'][t] for t in unique_terms if t in index['term_ids']],
+            dtype=np.int64,
+        )
+        scores = np.zeros(num_docs, dtype=np.float64)
+        if hit_term_ids.size:
+            _bm25_accumulate(
+                hit_term_ids, index['doc_ids'], index['tfs'],
+                index['offsets'], index['idf'], index['norm'], scores,
+            )
+
+        # Top-k via argpartition, then snippet extraction for those only
+        k = min(5, num_docs)
+        if k:
+            candidates = np.argpartition(scores, -k)[-k:]
+            top = sorted(
+                ((int(d), float(scores[d])) for d in candidates if scores[d] > 0),
+                key=lambda item: -item[1],
+            )
+        else:
+            top = []
+
+        # One compiled alternation finds any query term in a single scan
+        # of each line, instead of retesting every term per line
+        term_pattern = re.compile(
+            '|'.join(map(re.escape, sorted(unique_terms, key=len, reverse=True)))
+        ) if unique_terms else None
+
+        results = []
+        for doc_id, score in top:
+            doc = index['files'][doc_id]
+            lines = doc['lines']
+            line_starts = doc['line_starts']
+            relevant_sections = []
+            seen_lines = set()
+
+            # One pass over the whole document; each match offset maps to
+            # its line through the precomputed line-start offsets, so no
+            # per-line term retesting happens at all
+            for match in term_pattern.finditer(doc['content_lower']):
+                i = bisect_right(line_starts, match.start()) - 1
+                if i in seen_lines:
                     continue
-        
-        # Sort by relevance score
-        results.sort(key=lambda x: x['score'], reverse=True)
-        
+                seen_lines.add(i)
+                # Get context around matched line
+                start_idx = max(0, i - 2)
+                end_idx = min(len(lines), i + 3)
+                relevant_sections.append('\n'.join(lines[start_idx:end_idx]))
+                if len(relevant_sections) >= 3:
+                    break
+
+            if relevant_sections:
+                results.append({
+                    'file': doc['file'],
+                    'score': round(score, 2),
+                    'matched_terms': [
+                        term for term in unique_terms
+                        if _term_matches_doc(index, term, doc_id)
+                    ],
+                    'sections': relevant_sections  # Top 3 sections
+                })
+
         if not results:
             return f"No relevant documents found for query: '{query}'. Please try different keywords or run document ingestion."
         
@@ -176,7 +526,7 @@ def search_processed_documents(query: str, docs_dir: str) -> str:
         formatted_results.append(f"**Enhanced Search Results for:** '{query}'")
         formatted_results.append(f" **Found {len(results)} relevant documents**\n")
         
-        for i, result in enumerate(results[:5], 1):  # Top 5 results
+        for i, result in enumerate(results, 1):  # Top 5 results
             formatted_results.append(f"**Document {i}:** {result['file']}")
             formatted_results.append(f"⭐ **Relevance Score:** {result['score']}")
             formatted_results.append(f" **Matched Terms:** {', '.join(result['matched_terms'])}")
@@ -259,17 +609,28 @@ def enhanced_document_retrieval_tool(query: Union[str, Dict[str, Any]]) -> str:
         
         # Check cache first
         cache_key = generate_cache_key(search_query)
-        if cache_key in retrieval_cache:
-            cached_data = retrieval_cache[cache_key]
+        cached_data = retrieval_cache.get(cache_key)
+        if cached_data is not None:
             if time.time() - cached_data["timestamp"] < 1800:  # 30 min TTL
                 cache_stats["hits"] += 1
+                retrieval_cache.move_to_end(cache_key)
                 logger.info(f"💨 Cache hit for query: {search_query[:50]}...")
                 return cached_data["results"]
-        
+            # Expired: drop it now rather than leaving a stale entry
+            del retrieval_cache[cache_key]
+
         cache_stats["misses"] += 1
-        
-        # Use enhanced retrieval
-        results = enhanced_database_retrieval(search_query)
+
+        # Second-tier semantic cache catches paraphrases that the
+        # exact-match key above misses
+        results = semantic_cache_lookup(search_query)
+        if results is not None:
+            cache_stats["semantic_hits"] += 1
+            logger.info(f"Semantic cache hit for query: {search_query[:50]}...")
+        else:
+            # Use enhanced retrieval
+            results = enhanced_database_retrieval(search_query)
+            semantic_cache_store(search_query, results)
         
         # Cache results
         retrieval_cache[cache_key] = {
@@ -277,15 +638,16 @@ def enhanced_document_retrieval_tool(query: Union[str, Dict[str, Any]]) -> str:
             "timestamp": time.time()
         }
         
-        # Clean old cache entries
+        # Evict least recently used entry in O(1)
         if len(retrieval_cache) > 100:
-            oldest_key = min(retrieval_cache.keys(), 
-                           key=lambda k: retrieval_cache[k]["timestamp"])
-            del retrieval_cache[oldest_key]
+            retrieval_cache.popitem(last=False)
         
-        # Add query metadata to results
+        # Add query metadata to results. The decorated banner feeds back
+        # into an LLM agent, so by default it stays minimal; RAG_VERBOSE
+        # restores the full presentation for interactive use.
         processing_time = time.time() - start_time
-        enhanced_results = f"""
+        if os.getenv("RAG_VERBOSE"):
+            return f"""
 🤖 **Enhanced Agentic RAG Response**
 📅 **Processed:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 ⚡ **Processing Time:** {processing_time:.2f} seconds
@@ -295,8 +657,11 @@ def enhanced_document_retrieval_tool(query: Union[str, Dict[str, Any]]) -> str:
 
 💡 **Tip:** This response was generated using advanced RAG techniques including intelligent query processing, relevance scoring, and contextual understanding for optimal accuracy.
 """
-        
-        return enhanced_results
+
+        return (
+            f"[{processing_time:.2f}s cache={cache_stats['hits']}/{cache_stats['total_queries']}]\n"
+            f"{results}"
+        )
         
     except Exception as e:
         logger.error(f" Enhanced retrieval tool error: {e}")
@@ -316,5 +681,6 @@ def get_retrieval_stats() -> Dict[str, Any]:
         "cache_stats": cache_stats,
         "cache_hit_rate": f"{cache_hit_rate:.1f}%",
         "cache_size": len(retrieval_cache),
+        "semantic_cache_size": len(_sem_cache),
         "system_status": "enhanced_fallback_mode"
     }
\ No newline at end of file